@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import pandas as pd
+from contextlib import contextmanager
+
+AGGREGATES_DIR = "cex_aggregates"
+LOCK_TIMEOUT = 60  # seconds to wait for another process to finish its update
+LEDGER_COLUMNS = ["tx_id", "sender", "to_wallet", "cex", "day", "amount_sompi", "attributed"]
+VIEWS = {
+    "by_exchange": ["cex"],
+    "by_deposit_address": ["cex", "to_wallet"],
+    "by_day": ["cex", "day"],
+}
+
+def _empty_view(keys):
+    return pd.DataFrame(columns=keys + ["amount_sompi", "count"]).astype({"amount_sompi": "int64", "count": "int64"})
+
+# One set of aggregates per producer and threshold, e.g. cex_aggregates/batch_0.98 and cex_aggregates/watch_0.95:
+# attribution flags are only meaningful at the threshold they were computed with
+def aggregates_dir(source, threshold, base=AGGREGATES_DIR):
+    return os.path.join(base, f"{source}_{threshold:g}")
+
+# Exclusive lock on an aggregates dir for a whole load -> update -> save cycle (lock file created with O_EXCL)
+@contextmanager
+def locked(path, timeout=LOCK_TIMEOUT):
+    os.makedirs(path, exist_ok=True)
+    lock_path = os.path.join(path, ".lock")
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.time() > deadline:
+                raise TimeoutError(f"{lock_path} held for over {timeout}s; remove it if no other process is updating")
+            time.sleep(0.1)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+# Ledger of every deposit ever ingested (with its attribution flag) plus the materialized views
+def load_aggregates(path=AGGREGATES_DIR, threshold=None):
+    meta_path = os.path.join(path, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, "r") as f:
+            stored = json.load(f).get("threshold")
+        if threshold is not None and stored is not None and stored != threshold:
+            raise ValueError(f"{path} holds attribution at threshold {stored}, not {threshold}")
+        threshold = stored if threshold is None else threshold
+    aggs = {"threshold": threshold}
+    ledger_path = os.path.join(path, "ledger.csv")
+    if os.path.exists(ledger_path):
+        aggs["ledger"] = pd.read_csv(ledger_path, dtype={"day": str})
+    else:
+        aggs["ledger"] = pd.DataFrame(columns=LEDGER_COLUMNS)
+    for name, keys in VIEWS.items():
+        view_path = os.path.join(path, f"{name}.csv")
+        aggs[name] = pd.read_csv(view_path, dtype={"day": str}) if os.path.exists(view_path) else _empty_view(keys)
+    return aggs
+
+def save_aggregates(aggs, path=AGGREGATES_DIR):
+    os.makedirs(path, exist_ok=True)
+    for name in ["ledger"] + list(VIEWS):
+        tmp = os.path.join(path, f"{name}.csv.tmp")
+        aggs[name].to_csv(tmp, index=False)
+        os.replace(tmp, os.path.join(path, f"{name}.csv"))
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"threshold": aggs.get("threshold")}, f)
+
+# Add (sign=+1) or remove (sign=-1) ledger rows from every view without touching the other rows
+def _apply_delta(aggs, rows, sign):
+    if rows.empty:
+        return
+    for name, keys in VIEWS.items():
+        delta = rows.groupby(keys).agg(amount_sompi=("amount_sompi", "sum"), count=("tx_id", "size")) * sign
+        view = aggs[name].set_index(keys)[["amount_sompi", "count"]]
+        view = view.add(delta, fill_value=0).astype("int64")
+        aggs[name] = view[view["count"] != 0].reset_index()
+
+def _to_ledger_rows(df_deposits, eligible):
+    sender_col = "sender" if "sender" in df_deposits.columns else "from_address"
+    if "timestamp" in df_deposits.columns:
+        ts = pd.to_datetime(df_deposits["timestamp"], utc=True, errors="coerce")
+        day = ts.dt.strftime("%Y-%m-%d").where(ts > pd.Timestamp(0, tz="UTC"), "unknown")
+    else:
+        day = "unknown"
+    rows = pd.DataFrame({
+        "tx_id": df_deposits["tx_id"].astype(str),
+        "sender": df_deposits[sender_col],
+        "to_wallet": df_deposits["to_wallet"],
+        "cex": df_deposits["cex"],
+        "day": day,
+        "amount_sompi": (df_deposits["amount_kas"] * 1e8).round().astype("int64"),
+    })
+    rows["attributed"] = rows["sender"].isin(set(eligible))
+    return rows.drop_duplicates("tx_id")
+
+# Ingest only deposits whose tx_id is not in the ledger yet
+def ingest_deposits(aggs, df_deposits, eligible):
+    if df_deposits.empty:
+        return 0
+    rows = _to_ledger_rows(df_deposits, eligible)
+    rows = rows[~rows["tx_id"].isin(aggs["ledger"]["tx_id"].astype(str))]
+    if rows.empty:
+        return 0
+    aggs["ledger"] = pd.concat([aggs["ledger"], rows], ignore_index=True) if not aggs["ledger"].empty else rows
+    _apply_delta(aggs, rows[rows["attributed"]], +1)
+    return len(rows)
+
+# Re-evaluate attribution for the given senders and move their deposits in or out of the views
+def update_attribution(aggs, senders, eligible):
+    ledger = aggs["ledger"]
+    if ledger.empty:
+        return 0
+    scope = ledger["sender"].isin(set(senders))
+    now = ledger["sender"].isin(set(eligible))
+    was = ledger["attributed"].astype(bool)
+    gained = scope & now & ~was
+    lost = scope & ~now & was
+    _apply_delta(aggs, ledger[gained], +1)
+    _apply_delta(aggs, ledger[lost], -1)
+    ledger.loc[gained, "attributed"] = True
+    ledger.loc[lost, "attributed"] = False
+    return int(gained.sum() + lost.sum())
+
+# Retract ledger rows whose tx_id is no longer among the current deposits (CSV, label or CEX entry removed)
+def retract_missing(aggs, df_deposits):
+    ledger = aggs["ledger"]
+    if ledger.empty:
+        return 0
+    current = set(df_deposits["tx_id"].astype(str)) if not df_deposits.empty else set()
+    gone = ~ledger["tx_id"].astype(str).isin(current)
+    _apply_delta(aggs, ledger[gone & ledger["attributed"].astype(bool)], -1)
+    aggs["ledger"] = ledger[~gone].reset_index(drop=True)
+    return int(gone.sum())
+
+# Bring a batch ledger in line with the full current deposit set: retractions, flipped attributions, new deposits
+def refresh_aggregates(aggs, df_deposits, eligible):
+    retracted = retract_missing(aggs, df_deposits)
+    changed = update_attribution(aggs, df_deposits["sender"].unique() if not df_deposits.empty else [], eligible)
+    added = ingest_deposits(aggs, df_deposits, eligible)
+    return added, changed, retracted
+
+if __name__ == "__main__":
+    sets = sorted(os.listdir(AGGREGATES_DIR)) if os.path.isdir(AGGREGATES_DIR) else []
+    for name in sets:
+        aggs = load_aggregates(os.path.join(AGGREGATES_DIR, name))
+        ledger = aggs["ledger"]
+        print(f"📊 {name}: {len(ledger)} deposits in ledger, {int(ledger['attributed'].astype(bool).sum())} attributed "
+              f"at threshold {aggs['threshold']}")
+        for row in aggs["by_exchange"].itertuples():
+            print(f"   {row.cex:8} : {row.amount_sompi / 1e8:,.2f} KAS in {row.count} deposits")
@@ -0,0 +1,122 @@
+import os
+import numpy as np
+import pandas as pd
+from wallet_balances import compute_balances, EPOCH
+from edge_schema import load_edges, normalize
+from wallet_registry import CHAINGE_ROOTS, CEX_WALLETS
+
+FLOW_DATA_DIR = "flow_data"
+FULLHISTORY_DIR = "flow_data_fullhistory"
+REGISTRY_FILE = "cex_candidates.csv"
+HOT_WALLET_SHARE = 0.2      # a known deposit address sending ≥20% of its outflow somewhere marks that as a hot wallet
+MIN_SWEEPS = 2
+MIN_FAN_IN = 2
+MIN_SCORE = 0.7
+LATENCY_SCALE_S = 6 * 3600  # sweeps within a few hours of the deposit score high
+FAN_IN_SCALE = 20
+ZERO_TOLERANCE_SOMPI = 100_000_000  # 1 KAS left behind still counts as swept to zero
+REGISTRY_COLUMNS = ["address", "kind", "exchange", "score", "n_sweeps", "swept_kas", "sweep_share", "fan_in",
+                    "median_sweep_latency_s", "zero_balance_ratio"]
+
+# Every transfer we have on disk (fullhistory + tracer/KrcBot wallet files) as one deduplicated edge list,
+# plus the wallets traced into flow_dir (the Chainge side of the graph)
+def load_transfers(flow_dir=FLOW_DATA_DIR, fullhistory_dir=FULLHISTORY_DIR):
+    history, _ = load_edges(fullhistory_dir)
+    flows, traced = load_edges(flow_dir)
+    return normalize([history, flows]), traced
+
+# Hot wallets: where the known deposit addresses send a large share of what they receive
+def find_hot_wallets(df, known):
+    out = df[df["sender"].isin(known.keys())]
+    if out.empty:
+        return pd.DataFrame(columns=["address", "exchange", "share"])
+    per_pair = out.groupby(["sender", "recipient"])["amount_sompi"].sum().reset_index()
+    per_pair["share"] = per_pair["amount_sompi"] / per_pair.groupby("sender")["amount_sompi"].transform("sum")
+    per_pair = per_pair[(per_pair["share"] >= HOT_WALLET_SHARE) & ~per_pair["recipient"].isin(known.keys())]
+    per_pair["exchange"] = per_pair["sender"].map(known)
+    best = per_pair.sort_values("share", ascending=False).drop_duplicates("recipient")
+    return best.rename(columns={"recipient": "address"})[["address", "exchange", "share"]]
+
+# Score every address that sends into an exchange wallet by how deposit-address-like its flows are
+def score_candidates(df, targets, exclude=()):
+    is_sweep = df["recipient"].isin(targets.keys()) & ~df["sender"].isin(targets.keys()) & ~df["sender"].isin(exclude)
+    sweeps = df[is_sweep].assign(exchange=lambda d: d["recipient"].map(targets))
+    if sweeps.empty:
+        return pd.DataFrame()
+    candidates = sweeps["sender"].unique()
+
+    outflow = df[df["sender"].isin(candidates)].groupby("sender")["amount_sompi"].sum()
+    inflow = df[df["recipient"].isin(candidates)]
+    feats = sweeps.groupby("sender").agg(
+        n_sweeps=("tx_id", "nunique"),
+        swept_sompi=("amount_sompi", "sum"),
+    )
+    feats["sweep_share"] = feats["swept_sompi"] / outflow.reindex(feats.index)
+    feats["fan_in"] = inflow.groupby("recipient")["sender"].nunique().reindex(feats.index).fillna(0).astype(int)
+    feats["exchange"] = sweeps.groupby(["sender", "exchange"])["amount_sompi"].sum().reset_index() \
+        .sort_values("amount_sompi").drop_duplicates("sender", keep="last").set_index("sender")["exchange"]
+
+    # Timing features only use timestamped transfers: edge_schema writes 0 when the time is unknown (KrcBot),
+    # which would otherwise look like instant sweeps; wallets without any get no timing credit
+    timed = df[df["timestamp"] > 0]
+    timed_sweeps = sweeps[sweeps["timestamp"] > 0]
+
+    # Sweep latency: time from the latest inflow before each sweep to the sweep itself
+    left = timed_sweeps[["sender", "timestamp"]].rename(columns={"sender": "address"}).sort_values("timestamp")
+    right = inflow.loc[inflow["timestamp"] > 0, ["recipient", "timestamp"]]
+    right = right.rename(columns={"recipient": "address", "timestamp": "in_ts"}).sort_values("in_ts")
+    lat = pd.merge_asof(left, right, left_on="timestamp", right_on="in_ts", by="address", direction="backward")
+    lat["latency_s"] = (lat["timestamp"] - lat["in_ts"]) / 1000
+    feats["median_sweep_latency_s"] = lat.groupby("address")["latency_s"].median().reindex(feats.index)
+
+    # Balance-to-zero: running balance right after each sweep timestamp. A negative balance means inflows are
+    # missing from partial data, so it does not count as swept to zero.
+    balances = compute_balances(timed.assign(timestamp=pd.to_datetime(timed["timestamp"], unit="ms", utc=True)), candidates)
+    balances["timestamp"] = (balances["timestamp"] - EPOCH) // pd.Timedelta(milliseconds=1)
+    after = timed_sweeps[["sender", "timestamp", "tx_id"]].drop_duplicates(["sender", "tx_id"]).merge(
+        balances, left_on=["sender", "timestamp"], right_on=["wallet", "timestamp"], how="left")
+    after["zeroed"] = after["balance"].between(0, ZERO_TOLERANCE_SOMPI)
+    feats["zero_balance_ratio"] = after.groupby("sender")["zeroed"].mean().reindex(feats.index).fillna(0)
+
+    latency_score = np.exp(-feats["median_sweep_latency_s"].fillna(np.inf) / LATENCY_SCALE_S)
+    fan_in_score = np.minimum(1.0, np.log1p(feats["fan_in"]) / np.log1p(FAN_IN_SCALE))
+    feats["score"] = (0.35 * feats["sweep_share"].fillna(0).clip(0, 1) + 0.25 * feats["zero_balance_ratio"]
+                      + 0.2 * latency_score + 0.2 * fan_in_score)
+
+    feats = feats[(feats["n_sweeps"] >= MIN_SWEEPS) & (feats["fan_in"] >= MIN_FAN_IN)]
+    feats.index.name = "address"
+    return feats.reset_index().sort_values("score", ascending=False)
+
+# `exclude` must hold the roots and every traced wallet: the Chainge-funded intermediaries this analysis
+# measures also send into exchange wallets and must never be mistaken for deposit addresses
+def build_registry(df, known=CEX_WALLETS, exclude=CHAINGE_ROOTS):
+    hot = find_hot_wallets(df, known)
+    targets = {**known, **dict(zip(hot["address"], hot["exchange"]))}
+    deposits = score_candidates(df, targets, exclude)
+
+    hot = hot.assign(kind="hot_wallet", score=hot["share"])
+    if not deposits.empty:
+        deposits = deposits.assign(kind="deposit", swept_kas=deposits["swept_sompi"] / 1e8)
+    frames = [f.reindex(columns=REGISTRY_COLUMNS) for f in (hot, deposits) if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=REGISTRY_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+# {address: exchange} for every deposit-address entry at or above min_score; empty if no registry yet.
+# Hot wallets are exchange-internal and stay out: transfers into them are not customer deposits.
+def load_cex_candidates(path=REGISTRY_FILE, min_score=MIN_SCORE):
+    if not os.path.exists(path):
+        return {}
+    registry = pd.read_csv(path)
+    registry = registry[(registry["kind"] == "deposit") & (registry["score"] >= min_score)]
+    return dict(zip(registry["address"], registry["exchange"]))
+
+if __name__ == "__main__":
+    df, traced = load_transfers()
+    print(f"📥 Loaded {len(df):,} transfers ({len(traced)} traced wallets in {FLOW_DATA_DIR} excluded from candidates)")
+    registry = build_registry(df, CEX_WALLETS, set(CHAINGE_ROOTS) | set(traced))
+    registry.to_csv(REGISTRY_FILE, index=False)
+    accepted = registry[registry["score"] >= MIN_SCORE]
+    print(f"📝 Wrote {len(registry)} scored addresses to {REGISTRY_FILE} ({len(accepted)} with score ≥ {MIN_SCORE})")
+    for row in accepted.head(20).itertuples():
+        print(f"{row.exchange:8} {row.kind:10} {row.address} score={row.score:.2f}")
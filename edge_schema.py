@@ -0,0 +1,94 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Normalized edge schema shared by tracers and analysis: one row per (tx, sender, recipient) output,
+# timestamp as int64 milliseconds since epoch (0 when unknown)
+EDGE_COLUMNS = ["tx_id", "timestamp", "sender", "recipient", "amount_sompi"]
+TRACER_COLUMNS = {"tx_id", "timestamp", "sender", "recipient", "amount_sompi"}
+KRCBOT_COLUMNS = {"tx_id", "direction", "peer_address", "amount_sompi"}
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+# "kaspa_qq..._fullhistory.csv" / "kaspa_qq....csv" -> "kaspa:qq..." (addresses never contain "_")
+def wallet_from_filename(fname):
+    base = os.path.basename(fname)
+    for suffix in (".csv", "_fullhistory"):
+        if base.endswith(suffix):
+            base = base[: -len(suffix)]
+    return base.replace("_", ":", 1)
+
+def detect_schema(columns):
+    columns = set(columns)
+    if TRACER_COLUMNS <= columns:
+        return "tracer"
+    if KRCBOT_COLUMNS <= columns:
+        return "krcbot"
+    return None
+
+def _timestamp_ms(values):
+    if pd.api.types.is_integer_dtype(values):
+        return values
+    ts = pd.to_datetime(values, utc=True, errors="coerce")
+    return ((ts - EPOCH) // pd.Timedelta(milliseconds=1)).fillna(0).astype("int64")
+
+# Tracer output already is the normalized schema: columns are reused as-is, only ISO timestamps get converted
+def from_tracer(df):
+    edges = df[EDGE_COLUMNS]
+    if not pd.api.types.is_integer_dtype(edges["timestamp"]):
+        edges = edges.assign(timestamp=_timestamp_ms(edges["timestamp"]))
+    return edges
+
+# KrcBot rows are relative to the file's wallet: "sent" -> wallet pays peer, "received" -> peer pays wallet
+def from_krcbot(df, wallet):
+    sent = (df["direction"] == "sent").to_numpy()
+    peer = df["peer_address"].to_numpy()
+    return pd.DataFrame({
+        "tx_id": df["tx_id"].astype(str),
+        "timestamp": _timestamp_ms(df["timestamp"]) if "timestamp" in df.columns else np.zeros(len(df), dtype=np.int64),
+        "sender": np.where(sent, wallet, peer),
+        "recipient": np.where(sent, peer, wallet),
+        "amount_sompi": df["amount_sompi"].astype("int64"),
+    }, index=df.index)
+
+def adapt(df, wallet=None):
+    schema = detect_schema(df.columns)
+    if schema == "tracer":
+        return from_tracer(df)
+    if schema == "krcbot":
+        return from_krcbot(df, wallet)
+    raise ValueError(f"Unrecognized edge file columns: {list(df.columns)}")
+
+def read_edges_file(path):
+    df = pd.read_csv(path)
+    if detect_schema(df.columns) is None:
+        return None
+    return adapt(df, wallet_from_filename(path))
+
+def normalize(frames):
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame({c: pd.Series(dtype="int64" if c in ("timestamp", "amount_sompi") else object)
+                             for c in EDGE_COLUMNS})
+    edges = pd.concat(frames, ignore_index=True)
+    edges["amount_sompi"] = edges["amount_sompi"].astype("int64")
+    edges = edges.drop_duplicates(subset=["tx_id", "sender", "recipient", "amount_sompi"])
+    # Change outputs (a wallet paying itself) are not transfers and must not count as funding
+    edges = edges[edges["sender"] != edges["recipient"]]
+    return edges.reset_index(drop=True)
+
+# Every CSV of either schema in one or more directories; `traced` are the wallets that have their own file
+def load_edges(*dirs):
+    frames = []
+    traced = []
+    for data_dir in dirs:
+        if not os.path.isdir(data_dir):
+            continue
+        for fname in sorted(os.listdir(data_dir)):
+            if not fname.endswith(".csv"):
+                continue
+            edges = read_edges_file(os.path.join(data_dir, fname))
+            if edges is None:
+                continue
+            traced.append(wallet_from_filename(fname))
+            frames.append(edges)
+    return normalize(frames), sorted(set(traced))
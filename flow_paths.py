@@ -0,0 +1,100 @@
+import heapq
+import pandas as pd
+from collections import defaultdict, deque
+
+TOP_K = 3
+MAX_DEPTH = 6
+
+def _reverse_graph(graph):
+    reverse = defaultdict(list)
+    for src, nbrs in graph.items():
+        for dst in nbrs:
+            reverse[dst].append(src)
+    return reverse
+
+# Hop distance from every node to its nearest target, walking edges backwards (bounded by max_depth)
+def _distance_to_targets(reverse, targets, max_depth):
+    dist = {t: 0 for t in targets}
+    queue = deque(targets)
+    while queue:
+        node = queue.popleft()
+        if dist[node] >= max_depth:
+            continue
+        for prev in reverse.get(node, ()):
+            if prev not in dist:
+                dist[prev] = dist[node] + 1
+                queue.append(prev)
+    return dist
+
+def _unwind(label):
+    path = []
+    while label is not None:
+        node, label = label
+        path.append(node)
+    return path[::-1]
+
+# k widest (bottleneck-maximal) simple paths from any root to every target, in one best-first search.
+# Partial paths are expanded in order of decreasing bottleneck, so the first k arrivals at a target
+# are its k widest paths. Pruning: a partial path is dropped once it cannot reach a target that still
+# needs paths in the remaining hops, and at most k partial paths are expanded per (node, visited set),
+# since partial paths with the same end node and node set have exactly the same simple extensions.
+def top_k_widest_paths(graph, roots, targets, k=TOP_K, max_depth=MAX_DEPTH):
+    targets = set(targets)
+    reverse = _reverse_graph(graph)
+    dist = _distance_to_targets(reverse, targets, max_depth)
+    results = {t: [] for t in targets}
+    open_targets = set(targets)
+    expanded = defaultdict(int)
+
+    heap = []
+    counter = 0
+    for root in roots:
+        if root in dist:
+            heap.append((-float("inf"), counter, (root, None), frozenset([root])))
+            counter += 1
+    heapq.heapify(heap)
+
+    while heap and open_targets:
+        neg_width, _, label, visited = heapq.heappop(heap)
+        node = label[0]
+        depth = len(visited) - 1
+        if dist.get(node, max_depth + 1) + depth > max_depth:
+            continue
+        if expanded[(node, visited)] >= k:
+            continue
+        expanded[(node, visited)] += 1
+
+        if node in open_targets:
+            results[node].append((-neg_width, _unwind(label)))
+            if len(results[node]) == k:
+                open_targets.discard(node)
+                dist = _distance_to_targets(reverse, open_targets, max_depth)
+
+        if depth >= max_depth:
+            continue
+        for nbr, amount in graph.get(node, {}).items():
+            if nbr in visited or dist.get(nbr, max_depth + 1) + depth + 1 > max_depth:
+                continue
+            heapq.heappush(heap, (-min(-neg_width, amount), counter, (nbr, label), visited | {nbr}))
+            counter += 1
+
+    return results
+
+# Explain every deposit in df_verified with the k widest paths from the roots to its from_address
+def explain_deposits(df_verified, graph, roots, k=TOP_K, max_depth=MAX_DEPTH):
+    paths = top_k_widest_paths(graph, roots, df_verified["from_address"].unique(), k, max_depth)
+
+    rows = []
+    for dep in df_verified.itertuples():
+        for rank, (width, path) in enumerate(paths.get(dep.from_address, []), start=1):
+            path = path + [dep.to_wallet]
+            rows.append({
+                "tx_id": dep.tx_id,
+                "from_address": dep.from_address,
+                "to_wallet": dep.to_wallet,
+                "rank": rank,
+                "bottleneck_kas": width / 1e8 if width != float("inf") else None,
+                "hops": len(path) - 1,
+                "path": " → ".join(path),
+            })
+    return pd.DataFrame(rows, columns=["tx_id", "from_address", "to_wallet", "rank", "bottleneck_kas", "hops", "path"])
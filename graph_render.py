@@ -0,0 +1,148 @@
+import os
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.transforms import Affine2D
+
+MIN_WIDTH = 1.0
+MAX_WIDTH = 10.0
+BUNDLE_MIN_EDGES = 500    # graphs with fewer edges are drawn edge by edge
+BUNDLE_QUANTILE = 0.5     # above that, edges below this weight quantile are bundled per (source layer, target)
+BUNDLE_COLOR = "darkorchid"  # bundles and their synthetic bundle points are drawn apart from real edges
+HEAD_LENGTH = 2.0         # arrowhead length / half-width in multiples of the edge's line width...
+HEAD_HALF_WIDTH = 1.2
+HEAD_MIN_PT = 3.0         # ...plus this many points, so heads always stick out of the stroke
+RASTER_DPI = 200
+RASTER_MIN_ITEMS = BUNDLE_MIN_EDGES  # layers with more edges / nodes than this are rasterized in vector output
+TILE_LEVELS = 3           # zoom levels 0..N-1, level z has 2^z x 2^z tiles
+TILE_SIZE_IN = 8
+
+# Lump low-weight edges into per-(source layer, target) bundles once a graph is too dense to draw edge by edge.
+# A bundle is not a real transfer: it starts at a synthetic bundle point (the centroid of its bundled sources)
+# and carries their summed weight, so no real wallet is drawn sending flow it never sent. Returns the segments,
+# their weights and a mask of which segments are bundles. u→v and v→u stay separate, each with its own arrowhead.
+def bundle_edges(G, pos, node_layer=None, quantile=BUNDLE_QUANTILE, min_edges=BUNDLE_MIN_EDGES):
+    edges = list(G.edges(data="weight", default=1.0))
+    if not edges:
+        return np.empty((0, 2, 2)), np.empty(0), np.empty(0, dtype=bool)
+
+    weights = np.asarray([w for _, _, w in edges], dtype=float)
+    if len(edges) <= min_edges:
+        strong = np.ones(len(edges), dtype=bool)
+    else:
+        strong = weights > np.quantile(weights, quantile)
+
+    segments = [(pos[u], pos[v]) for (u, v, _), s in zip(edges, strong) if s]
+    seg_weights = list(weights[strong])
+
+    bundles = {}
+    for (u, v, _), w, s in zip(edges, weights, strong):
+        if s:
+            continue
+        layer = node_layer.get(u) if node_layer else None
+        acc = bundles.setdefault((layer, v), [[], 0.0])
+        acc[0].append(pos[u])
+        acc[1] += w
+    for (_, v), (sources, total) in bundles.items():
+        segments.append((np.mean(sources, axis=0), pos[v]))
+        seg_weights.append(total)
+
+    bundled = np.zeros(len(segments), dtype=bool)
+    bundled[len(segments) - len(bundles):] = True
+    return np.asarray(segments, dtype=float).reshape(-1, 2, 2), np.asarray(seg_weights, dtype=float), bundled
+
+# Linear width scaling clamped to MIN_WIDTH–MAX_WIDTH
+def scale_widths(weights, min_width=MIN_WIDTH, max_width=MAX_WIDTH):
+    if len(weights) == 0:
+        return weights
+    lo, hi = weights.min(), weights.max()
+    if hi <= lo:
+        return np.full(len(weights), min_width)
+    return min_width + (max_width - min_width) * (weights - lo) / (hi - lo)
+
+def _rasterized(rasterize, n_items):
+    return n_items > RASTER_MIN_ITEMS if rasterize is None else rasterize
+
+# One LineCollection for real edges, one (dashed, with bundle-point markers) for bundles, one PolyCollection
+# for all arrowheads, one scatter for all nodes. Only layers with more than RASTER_MIN_ITEMS items are rasterized
+# (rasterize=None), so small graphs stay pure vector. Returns (lines, bundle_lines); bundle_lines is None when
+# nothing was bundled, otherwise it can be passed to a legend.
+def draw_graph(ax, G, pos, node_colors, node_sizes, labels, node_layer=None,
+               bundle=True, arrows=True, rasterize=None, font_size=6):
+    segments, weights, bundled = bundle_edges(G, pos, node_layer, min_edges=BUNDLE_MIN_EDGES if bundle else np.inf)
+    widths = scale_widths(weights)
+
+    lines = LineCollection(segments[~bundled], linewidths=widths[~bundled], colors="gray", alpha=0.6, zorder=1)
+    lines.set_rasterized(_rasterized(rasterize, len(segments)))
+    ax.add_collection(lines)
+
+    bundle_lines = None
+    if bundled.any():
+        bundle_lines = LineCollection(segments[bundled], linewidths=widths[bundled], colors=BUNDLE_COLOR,
+                                      linestyles="--", alpha=0.6, zorder=1, label="Bundled weak edges (summed)")
+        bundle_lines.set_rasterized(_rasterized(rasterize, len(segments)))
+        ax.add_collection(bundle_lines)
+        points = segments[bundled, 0]
+        ax.scatter(points[:, 0], points[:, 1], marker="D", s=12, c=BUNDLE_COLOR, zorder=2)
+
+    if arrows and len(segments):
+        heads = arrowheads(ax, segments, widths)
+        heads.set_rasterized(_rasterized(rasterize, len(segments)))
+
+    nodes = list(G.nodes)
+    xy = np.asarray([pos[n] for n in nodes], dtype=float).reshape(-1, 2)
+    points = ax.scatter(xy[:, 0], xy[:, 1], c=node_colors, s=node_sizes, zorder=2)
+    points.set_rasterized(_rasterized(rasterize, len(nodes)))
+
+    # Labels stay vector text so they remain sharp in the PDF
+    for node, (x, y) in zip(nodes, xy):
+        if node in labels:
+            ax.text(x, y, labels[node], fontsize=font_size, ha="center", va="center", zorder=3)
+
+    ax.set_aspect("equal", adjustable="datalim")
+    ax.autoscale_view()
+    return lines, bundle_lines
+
+# One PolyCollection of arrowheads sized in points from each edge's line width, with the tip 80% of the way
+# along the edge so it is not hidden under the target node. Directions are taken in data space (equal aspect).
+def arrowheads(ax, segments, widths, color="dimgray"):
+    start, end = segments[:, 0], segments[:, 1]
+    tip = start + 0.8 * (end - start)
+    direction = end - start
+    norm = np.hypot(direction[:, 0], direction[:, 1])
+    norm[norm == 0] = 1.0
+    direction = direction / norm[:, None]
+
+    back = -direction * (HEAD_LENGTH * widths + HEAD_MIN_PT)[:, None]
+    side = np.column_stack([-direction[:, 1], direction[:, 0]]) * (HEAD_HALF_WIDTH * widths + HEAD_MIN_PT / 2)[:, None]
+    verts = np.stack([np.zeros_like(direction), back + side, back - side], axis=1)
+
+    heads = PolyCollection(verts, offsets=tip, offset_transform=ax.transData,
+                           transform=Affine2D().scale(1 / 72) + ax.figure.dpi_scale_trans,
+                           facecolors=color, edgecolors="none", zorder=1.5)
+    ax.add_collection(heads, autolim=False)
+    return heads
+
+# Save a zoomable tile pyramid: level z splits the full extent into 2^z x 2^z PNG tiles
+def save_tiles(fig, ax, out_dir, levels=TILE_LEVELS, dpi=RASTER_DPI):
+    os.makedirs(out_dir, exist_ok=True)
+    x0, x1 = ax.get_xlim()
+    y0, y1 = ax.get_ylim()
+    fig.set_size_inches(TILE_SIZE_IN, TILE_SIZE_IN)
+
+    written = []
+    for z in range(levels):
+        n = 2 ** z
+        xs = np.linspace(x0, x1, n + 1)
+        ys = np.linspace(y1, y0, n + 1)
+        for row in range(n):
+            for col in range(n):
+                ax.set_xlim(xs[col], xs[col + 1])
+                ax.set_ylim(ys[row + 1], ys[row])
+                path = os.path.join(out_dir, f"tile_{z}_{row}_{col}.png")
+                fig.savefig(path, dpi=dpi)
+                written.append(path)
+
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    print(f"🗺️ Wrote {len(written)} tiles ({levels} zoom levels) to {out_dir}")
+    return written
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from edge_schema import load_edges
+
+FLOW_DATA_DIR = "flow_data"
+SNAPSHOT_DIR = "flow_snapshot"
+SNAPSHOT_VERSION = 1
+ARRAYS = ["addresses", "traced", "indptr", "dst", "src", "amount", "timestamp", "tx_id", "rev_indptr", "rev_edge"]
+
+# Interned address table + forward/reverse CSR over the edge list, as plain numpy arrays
+def build_arrays(edges, traced):
+    addresses = np.unique(np.concatenate([
+        edges["sender"].to_numpy(dtype=str), edges["recipient"].to_numpy(dtype=str), np.asarray(traced, dtype=str)
+    ])).astype("S")
+    src = np.searchsorted(addresses, edges["sender"].to_numpy(dtype=str).astype("S")).astype(np.int32)
+    dst = np.searchsorted(addresses, edges["recipient"].to_numpy(dtype=str).astype("S")).astype(np.int32)
+
+    order = np.lexsort((dst, src))
+    n = len(addresses)
+    src, dst = src[order], dst[order]
+    arrays = {
+        "addresses": addresses,
+        "traced": np.isin(addresses, np.asarray(traced, dtype=str).astype("S")),
+        "indptr": np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n))]).astype(np.int64),
+        "dst": dst,
+        "src": src,
+        "amount": edges["amount_sompi"].to_numpy(dtype=np.int64)[order],
+        "timestamp": edges["timestamp"].to_numpy(dtype=np.int64)[order],
+        "tx_id": edges["tx_id"].to_numpy(dtype=str).astype("S")[order],
+    }
+    rev_edge = np.argsort(dst, kind="stable").astype(np.int64)
+    arrays["rev_indptr"] = np.concatenate([[0], np.cumsum(np.bincount(dst, minlength=n))]).astype(np.int64)
+    arrays["rev_edge"] = rev_edge
+    return arrays
+
+# {file name: [size, mtime]} of every CSV in flow_dir, recorded in meta.json to detect added/removed/changed files
+def source_files(flow_dir):
+    if not os.path.isdir(flow_dir):
+        return {}
+    sources = {}
+    for fname in sorted(os.listdir(flow_dir)):
+        if fname.endswith(".csv"):
+            st = os.stat(os.path.join(flow_dir, fname))
+            sources[fname] = [st.st_size, st.st_mtime]
+    return sources
+
+def write_snapshot(arrays, out_dir=SNAPSHOT_DIR, source_dir=None, sources=None):
+    os.makedirs(out_dir, exist_ok=True)
+    for name in ARRAYS:
+        np.save(os.path.join(out_dir, f"{name}.npy"), arrays[name])
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "built_at": time.time(),
+        "source_dir": source_dir,
+        "n_addresses": int(len(arrays["addresses"])),
+        "n_edges": int(len(arrays["dst"])),
+        "sources": sources or {},
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+def build_snapshot(flow_dir=FLOW_DATA_DIR, out_dir=SNAPSHOT_DIR):
+    sources = source_files(flow_dir)
+    edges, traced = load_edges(flow_dir)
+    return write_snapshot(build_arrays(edges, traced), out_dir, flow_dir, sources)
+
+# Open every array memory-mapped: nothing is read until it is touched, and the pages are shared across processes
+def open_snapshot(path=SNAPSHOT_DIR):
+    with open(os.path.join(path, "meta.json"), "r") as f:
+        meta = json.load(f)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {meta.get('version')} in {path}")
+    snap = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+    snap["meta"] = meta
+    return snap
+
+# True if the snapshot exists and flow_dir still holds exactly the CSVs (names, sizes, mtimes) it was built from
+def snapshot_is_fresh(path=SNAPSHOT_DIR, flow_dir=FLOW_DATA_DIR):
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path) or not os.path.isdir(flow_dir):
+        return False
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    return meta.get("version") == SNAPSHOT_VERSION and meta.get("sources") == source_files(flow_dir)
+
+def address_ids(snap, addrs):
+    keys = np.asarray(list(addrs), dtype=str).astype("S")
+    if len(snap["addresses"]) == 0:
+        return np.full(len(keys), -1)
+    idx = np.searchsorted(snap["addresses"], keys)
+    idx = np.minimum(idx, len(snap["addresses"]) - 1)
+    found = snap["addresses"][idx] == keys
+    return np.where(found, idx, -1)
+
+def _expand(indptr, nodes):
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+# Hop distance from the roots along funding edges (edges into traced wallets), -1 beyond max_depth.
+# A wallet with 0 <= dist <= max_depth is exactly what the reverse-BFS "Chainge" classification finds.
+def chainge_distance(snap, roots, max_depth):
+    n = len(snap["addresses"])
+    dist = np.full(n, -1, dtype=np.int32)
+    frontier = address_ids(snap, roots)
+    frontier = frontier[frontier >= 0]
+    dist[frontier] = 0
+    funding = snap["traced"][snap["dst"]]
+    for depth in range(1, max_depth + 1):
+        if len(frontier) == 0:
+            break
+        edge_ids = _expand(snap["indptr"], frontier)
+        edge_ids = edge_ids[funding[edge_ids]]
+        nbrs = np.unique(snap["dst"][edge_ids])
+        frontier = nbrs[dist[nbrs] < 0]
+        dist[frontier] = depth
+    return dist
+
+# Same df_deposits / df_pivot the summary scripts build from CSVs, computed on the snapshot arrays
+def attribution_tables(snap, roots, cex_wallets, max_depth):
+    addresses = snap["addresses"]
+    traced = snap["traced"]
+    src, dst = snap["src"], snap["dst"]
+
+    cex_ids = address_ids(snap, cex_wallets.keys())
+    is_cex = np.zeros(len(addresses), dtype=bool)
+    is_cex[cex_ids[cex_ids >= 0]] = True
+
+    dep = np.flatnonzero(traced[src] & is_cex[dst])
+    _, first = np.unique(snap["tx_id"][dep], return_index=True)
+    dep = dep[np.sort(first)]
+    to_wallet = addresses[dst[dep]].astype(str)
+    df_deposits = pd.DataFrame({
+        "tx_id": snap["tx_id"][dep].astype(str),
+        "sender": addresses[src[dep]].astype(str),
+        "to_wallet": to_wallet,
+        "cex": [cex_wallets[w] for w in to_wallet],
+        "amount_kas": snap["amount"][dep] / 1e8,
+        "timestamp": pd.to_datetime(snap["timestamp"][dep], unit="ms", utc=True),
+    })
+
+    df_pivot = _funding_pivot(snap, chainge_distance(snap, roots, max_depth), np.unique(src[dep]))
+    return df_deposits, df_pivot
+
+# Funding of the given wallets (ids), split by whether the funder is Chainge-reachable
+def _funding_pivot(snap, dist, wallet_ids):
+    edge_ids = snap["rev_edge"][_expand(snap["rev_indptr"], wallet_ids)]
+    amount_kas = snap["amount"][edge_ids] / 1e8
+    from_chainge = dist[snap["src"][edge_ids]] >= 0
+
+    df_pivot = pd.DataFrame({
+        "recipient": snap["addresses"][snap["dst"][edge_ids]].astype(str),
+        "Chainge": np.where(from_chainge, amount_kas, 0.0),
+        "External": np.where(from_chainge, 0.0, amount_kas),
+    }).groupby("recipient").sum()
+    df_pivot["total"] = df_pivot.sum(axis=1)
+    df_pivot["chainge_pct"] = df_pivot["Chainge"] / df_pivot["total"]
+    return df_pivot
+
+# chainge_pct of every traced wallet, depositing or not
+def funding_pivot(snap, roots, max_depth):
+    return _funding_pivot(snap, chainge_distance(snap, roots, max_depth), np.flatnonzero(snap["traced"]))
+
+# Every edge into the given wallets as a sender / recipient / amount_kas frame
+def funding_edges(snap, wallets):
+    ids = address_ids(snap, wallets)
+    edge_ids = snap["rev_edge"][_expand(snap["rev_indptr"], ids[ids >= 0])]
+    return pd.DataFrame({
+        "sender": snap["addresses"][snap["src"][edge_ids]].astype(str),
+        "recipient": snap["addresses"][snap["dst"][edge_ids]].astype(str),
+        "amount_kas": snap["amount"][edge_ids] / 1e8,
+    })
+
+# Weighted funding graph (sender -> {recipient: total sompi} over edges into traced wallets) for flow_paths
+def funding_graph(snap):
+    edge_ids = np.flatnonzero(snap["traced"][snap["dst"]])
+    totals = pd.DataFrame({
+        "src": snap["src"][edge_ids], "dst": snap["dst"][edge_ids], "amount": snap["amount"][edge_ids],
+    }).groupby(["src", "dst"])["amount"].sum()
+    addresses = snap["addresses"]
+    graph = defaultdict(dict)
+    for (src, dst), amount in totals.items():
+        graph[addresses[src].decode()][addresses[dst].decode()] = int(amount)
+    return graph
+
+if __name__ == "__main__":
+    started = time.time()
+    meta = build_snapshot()
+    print(f"📦 Snapshot of {meta['n_addresses']:,} addresses / {meta['n_edges']:,} edges "
+          f"written to {SNAPSHOT_DIR}/ in {time.time() - started:.1f}s")
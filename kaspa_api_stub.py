@@ -0,0 +1,247 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+UPSTREAM_API = "https://api.kaspa.org"
+FIXTURE_DIR = "api_fixtures"
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+PAGE_PATH = re.compile(r"^/addresses/(?P<address>[^/]+)/full-transactions-page$")
+BECH32_CHARS = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+
+# All transactions, indexed by every address that appears as an input or output
+class TxStore:
+    def __init__(self):
+        self.txs = {}
+        self.by_address = {}
+        self.lock = threading.Lock()
+
+    def add(self, tx):
+        txid = tx.get("transaction_id")
+        if not txid or txid in self.txs:
+            return False
+        self.txs[txid] = tx
+        addrs = {inp.get("previous_outpoint_address") for inp in tx.get("inputs") or []}
+        addrs |= {out.get("script_public_key_address") for out in tx.get("outputs") or []}
+        for addr in addrs - {None}:
+            self.by_address.setdefault(addr, []).append(tx)
+        return True
+
+    def sort(self):
+        for txs in self.by_address.values():
+            txs.sort(key=lambda t: t.get("block_time", 0), reverse=True)
+
+    # Same paging rules as the public API: `before` pages backwards, `after` pages forwards,
+    # and every page is returned newest-first
+    def page(self, address, limit, before=0, after=0):
+        with self.lock:
+            txs = self.by_address.get(address, [])
+            if before:
+                page = [t for t in txs if t.get("block_time", 0) < before][:limit]
+            elif after:
+                newer = [t for t in txs if t.get("block_time", 0) > after]
+                page = newer[-limit:]
+            else:
+                page = txs[:limit]
+        return page
+
+def load_fixtures(fixture_dir=FIXTURE_DIR):
+    store = TxStore()
+    for path in glob.glob(os.path.join(fixture_dir, "*.json")):
+        with open(path, "r") as f:
+            for tx in json.load(f):
+                store.add(tx)
+    store.sort()
+    print(f"📂 Loaded {len(store.txs)} transactions for {len(store.by_address)} addresses from {fixture_dir}")
+    return store
+
+def save_fixture(store, address, fixture_dir=FIXTURE_DIR):
+    os.makedirs(fixture_dir, exist_ok=True)
+    path = os.path.join(fixture_dir, f"{address.replace(':', '_')}.json")
+    with store.lock:
+        txs = list(store.by_address.get(address, []))
+    with open(path, "w") as f:
+        json.dump(txs, f)
+
+def random_address(rng):
+    return "kaspa:q" + "".join(rng.choice(BECH32_CHARS) for _ in range(60))
+
+def make_tx(rng, sender, recipient, amount, block_time):
+    txid = hashlib.sha256(f"{sender}{recipient}{amount}{block_time}{rng.random()}".encode()).hexdigest()
+    change = rng.randint(1, 10_000) * 100_000_000
+    return {
+        "transaction_id": txid,
+        "block_time": block_time,
+        "inputs": [{"previous_outpoint_address": sender, "previous_outpoint_amount": amount + change}],
+        "outputs": [
+            {"script_public_key_address": recipient, "amount": amount},
+            {"script_public_key_address": sender, "amount": change},
+        ],
+    }
+
+# Layered graph roots -> intermediaries -> CEX deposit addresses, plus external funders mixed in
+def synthetic_store(roots, cex_wallets, n_intermediaries=200, n_external=200, n_txs=20_000,
+                    seed=0, start_ms=1685577600000, span_ms=400 * 86_400_000):
+    rng = random.Random(seed)
+    layer1 = [random_address(rng) for _ in range(n_intermediaries // 2)]
+    layer2 = [random_address(rng) for _ in range(n_intermediaries - len(layer1))]
+    external = [random_address(rng) for _ in range(n_external)]
+    cex = list(cex_wallets)
+
+    hops = [(roots, layer1), (layer1, layer2), (layer1 + layer2, cex), (external, layer1 + layer2), (external, cex)]
+    times = sorted(rng.randrange(start_ms, start_ms + span_ms) for _ in range(n_txs))
+
+    store = TxStore()
+    for block_time in times:
+        senders, recipients = rng.choice(hops)
+        amount = int(rng.lognormvariate(10, 2)) * 100_000_000
+        store.add(make_tx(rng, rng.choice(senders), rng.choice(recipients), amount, block_time))
+    store.sort()
+    print(f"🧪 Generated {len(store.txs)} synthetic transactions over {len(store.by_address)} addresses (seed={seed})")
+    return store
+
+# Deterministic fault injection: each request's outcome is drawn from an RNG keyed on the seed, the request
+# (address and paging parameters) and how many times that same request was made before, so a retried
+# request can succeed and results do not depend on how concurrent clients interleave (as long as two clients
+# do not issue the very same request)
+class Faults:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=1, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self.attempts = {}
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "transactions_served": 0}
+
+    def draw(self, key):
+        with self.lock:
+            self.stats["requests"] += 1
+            attempt = self.attempts.get(key, 0)
+            self.attempts[key] = attempt + 1
+        rng = random.Random(f"{self.seed}:{key}:{attempt}")
+        roll = rng.random()
+        delay = (self.latency_ms + rng.uniform(0, self.jitter_ms)) / 1000
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 500
+        return delay, 200
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+def make_handler(store, faults, upstream=None, fixture_dir=FIXTURE_DIR):
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def send_json(self, status, body, headers=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, str(v))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/_stats":
+                with faults.lock:
+                    return self.send_json(200, dict(faults.stats))
+            match = PAGE_PATH.match(url.path)
+            if not match:
+                return self.send_json(404, {"detail": "Not Found"})
+
+            delay, status = faults.draw(f"{match.group('address')}?{url.query}")
+            if delay:
+                time.sleep(delay)
+            if status == 429:
+                faults.count("rate_limited")
+                return self.send_json(429, {"detail": "Too Many Requests"}, {"Retry-After": faults.retry_after})
+            if status != 200:
+                faults.count("errors")
+                return self.send_json(status, {"detail": "Injected error"})
+
+            address = match.group("address")
+            query = parse_qs(url.query)
+            limit = min(int(query.get("limit", [DEFAULT_LIMIT])[0]), MAX_LIMIT)
+            before = int(query.get("before", [0])[0])
+            after = int(query.get("after", [0])[0])
+
+            # Record mode: forward to the real API and keep whatever comes back as a fixture
+            if upstream:
+                resp = requests.get(f"{upstream}{self.path}", timeout=30)
+                if resp.status_code == 200:
+                    # Sorting empties each list while it runs, so it must not race with page()
+                    with store.lock:
+                        added = [store.add(tx) for tx in resp.json()]
+                        if any(added):
+                            store.sort()
+                    if any(added):
+                        save_fixture(store, address, fixture_dir)
+
+            page = store.page(address, limit, before, after)
+            headers = {}
+            if page:
+                headers["X-Next-Page-Before"] = min(t.get("block_time", 0) for t in page)
+                headers["X-Next-Page-After"] = max(t.get("block_time", 0) for t in page)
+            faults.count("ok")
+            faults.count("transactions_served", len(page))
+            self.send_json(200, page, headers)
+
+    return StubHandler
+
+def make_server(store, faults=None, host="127.0.0.1", port=8000, upstream=None, fixture_dir=FIXTURE_DIR):
+    return ThreadingHTTPServer((host, port), make_handler(store, faults or Faults(), upstream, fixture_dir))
+
+# Start a stub in a background thread; returns (server, base_url) for tests and benchmarks
+def serve_in_thread(store, faults=None, host="127.0.0.1", port=0, **kwargs):
+    server = make_server(store, faults, host, port, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local record/replay stub of the Kaspa REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="directory of recorded <address>.json fixtures")
+    parser.add_argument("--record", action="store_true", help="proxy to --upstream and save responses as fixtures")
+    parser.add_argument("--upstream", default=UPSTREAM_API)
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N_TXS", help="serve a generated graph instead of fixtures")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from wallet_registry import CHAINGE_ROOTS, CEX_WALLETS
+        store = synthetic_store(CHAINGE_ROOTS, CEX_WALLETS, n_txs=args.synthetic, seed=args.seed)
+    else:
+        store = load_fixtures(args.fixtures) if os.path.isdir(args.fixtures) else TxStore()
+
+    faults = Faults(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_rate, args.retry_after, args.seed)
+    server = make_server(store, faults, args.host, args.port, args.upstream if args.record else None, args.fixtures)
+    print(f"🛰️ Kaspa API stub listening on http://{args.host}:{args.port} "
+          f"({'recording' if args.record else 'replay'}; export KASPA_API_BASE=http://{args.host}:{args.port})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
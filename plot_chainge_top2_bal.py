@@ -1,6 +1,5 @@
-import pandas as pd
 import matplotlib.pyplot as plt
-import os
+from wallet_balances import load_fullhistory, compute_balances, wallet_summary
 
 DATA_DIR = "flow_data_fullhistory"
 WALLETS = {
@@ -8,52 +7,18 @@ WALLETS = {
     "kaspa:qpgmt2dn8wcqf0436n0kueap7yx82n7raurlj6aqjc3t3wm9y5ssqtg9e4lsm": "Chainge 2",
 }
 
-wallet_ids = list(WALLETS.keys())
-dfs = []
+df_all = load_fullhistory(DATA_DIR, WALLETS.keys())
 
-for wallet in wallet_ids:
-    file_path = os.path.join(DATA_DIR, f"{wallet.replace(':', '_')}_fullhistory.csv")
-    if os.path.exists(file_path):
-        df = pd.read_csv(file_path)
-        df["wallet"] = wallet
-        dfs.append(df)
-
-if not dfs:
+if df_all.empty:
     print("❗ No wallet CSV files found.")
 else:
-    df_all = pd.concat(dfs, ignore_index=True)
-    df_all["timestamp"] = pd.to_datetime(df_all["timestamp"], utc=True, errors="coerce")
-    df_all = df_all.dropna(subset=["timestamp"])
-    df_all = df_all.drop_duplicates(subset=["tx_id", "amount_sompi", "sender", "recipient", "timestamp"])
-    df_all = df_all[df_all["sender"] != df_all["recipient"]]
-    df_all.sort_values("timestamp", inplace=True)
-
-    # Filter only inter-wallet relevant transactions
-    flows = []
-    for wallet, label in WALLETS.items():
-        inflow = df_all[df_all["recipient"] == wallet].copy()
-        inflow["wallet"] = label
-        inflow["flow"] = inflow["amount_sompi"]
-        outflow = df_all[df_all["sender"] == wallet].copy()
-        outflow["wallet"] = label
-        outflow["flow"] = -outflow["amount_sompi"]
-        flows.append(pd.concat([inflow, outflow]))
-
-    tx_df = pd.concat(flows)[["timestamp", "wallet", "flow"]]
-    tx_df = tx_df.groupby(["timestamp", "wallet"], as_index=False).sum()
-    tx_df["balance"] = tx_df.groupby("wallet")["flow"].cumsum()
-
-    # Max balance and totals
-    inflows = {}
-    outflows = {}
-    max_balances = {}
-    for wallet, label in WALLETS.items():
-        inflow = df_all[df_all["recipient"] == wallet]["amount_sompi"].sum() / 1e8
-        outflow = df_all[df_all["sender"] == wallet]["amount_sompi"].sum() / 1e8
-        max_bal = tx_df[tx_df["wallet"] == label]["balance"].max() / 1e8
-        inflows[label] = inflow
-        outflows[label] = outflow
-        max_balances[label] = max_bal
+    # Balances, max balance and totals for all wallets in one pass
+    balances = compute_balances(df_all, WALLETS.keys())
+    summary = wallet_summary(df_all, balances, WALLETS.keys()).rename(index=WALLETS)
+    tx_df = balances.assign(wallet=balances["wallet"].map(WALLETS))
+    inflows = (summary["inflow_sompi"] / 1e8).to_dict()
+    outflows = (summary["outflow_sompi"] / 1e8).to_dict()
+    max_balances = (summary["max_balance_sompi"] / 1e8).to_dict()
 
     # Plotting
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10), sharex=False)
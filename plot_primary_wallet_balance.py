@@ -1,6 +1,6 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
+from wallet_balances import read_fullhistory, dedupe_transfers, compute_balances, wallet_summary
 
 DATA_DIR = "flow_data_fullhistory"
 PRIMARY_WALLET = "kaspa:qqwvnkp47wsj6n4hkdlgj8dsauyx0xvefunnwvvsmpq2udd0ka8ckmpuqw3k5"
@@ -13,29 +13,19 @@ file_path = get_filename(PRIMARY_WALLET)
 if not os.path.exists(file_path):
     print("❗ No data file found for the primary wallet.")
 else:
-    df = pd.read_csv(file_path)
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
-    df = df.dropna(subset=["timestamp"])
-    df.sort_values("timestamp", inplace=True)
-
+    df = read_fullhistory(DATA_DIR, [PRIMARY_WALLET])
     before_dedup = len(df)
-    df = df.drop_duplicates(subset=["tx_id", "amount_sompi", "sender", "recipient", "timestamp"])
-    df = df[df["sender"] != df["recipient"]]
+    df = dedupe_transfers(df)
     after_dedup = len(df)
     print(f"✅ Deduplicated: {before_dedup - after_dedup} duplicates removed")
 
-    df["flow"] = 0
-    df.loc[df["recipient"] == PRIMARY_WALLET, "flow"] = df["amount_sompi"]
-    df.loc[df["sender"] == PRIMARY_WALLET, "flow"] = -df["amount_sompi"]
-
-    flow_df = df[["timestamp", "flow"]].copy()
-    flow_df = flow_df.groupby("timestamp", as_index=False).sum()
-    flow_df["balance"] = flow_df["flow"].cumsum()
-    flow_df.set_index("timestamp", inplace=True)
+    balances = compute_balances(df, [PRIMARY_WALLET])
+    summary = wallet_summary(df, balances, [PRIMARY_WALLET]).loc[PRIMARY_WALLET]
+    flow_df = balances.set_index("timestamp")
 
-    inflow = df[df["recipient"] == PRIMARY_WALLET]["amount_sompi"].sum() / 1e8
-    outflow = df[df["sender"] == PRIMARY_WALLET]["amount_sompi"].sum() / 1e8
-    max_balance = flow_df["balance"].max() / 1e8
+    inflow = summary["inflow_sompi"] / 1e8
+    outflow = summary["outflow_sompi"] / 1e8
+    max_balance = summary["max_balance_sompi"] / 1e8
 
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 9), sharex=False)
 
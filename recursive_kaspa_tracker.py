@@ -4,12 +4,18 @@ import os
 import json
 import pandas as pd
 from datetime import datetime, timezone
+from edge_schema import from_tracer, read_edges_file, normalize
+from graph_snapshot import build_arrays, attribution_tables
+from wallet_registry import CHAINGE_ROOTS, CEX_WALLETS
 
-API_BASE = "https://api.kaspa.org"
+API_BASE = os.environ.get("KASPA_API_BASE", "https://api.kaspa.org")
 graph_data = {}
 CHECKPOINT_FILE = "flow_data/tracer_state.json"
 MAX_DEPTH = 2
 START_TIMESTAMP_MS = 1685577600000  # June 1, 2023
+ANALYZE_AFTER_TRACE = True  # run attribution on the traced edges in-process when tracing finishes
+ATTRIBUTION_DEPTH = 4
+THRESHOLD = 0.95
 
 def load_state():
     state = {"queue": [], "completed": set()}
@@ -78,7 +84,7 @@ def fetch_transactions(address, max_pages=100, start_timestamp=START_TIMESTAMP_M
     print(f"✅ Total fetched: {len(txs)} transactions for {address}")
     return txs
 
-def trace_wallet(state, address, depth, force=False):
+def trace_wallet(state, address, depth, force=False, on_edges=None):
     if depth < 0 or (address in state["completed"] and not force):
         return
 
@@ -88,6 +94,8 @@ def trace_wallet(state, address, depth, force=False):
 
     if os.path.exists(filename) and not force:
         print(f"⏩ Skipping {address} (already processed)")
+        if on_edges:
+            on_edges(address, read_edges_file(filename))
         return
 
     txs = fetch_transactions(address)
@@ -135,6 +143,9 @@ def trace_wallet(state, address, depth, force=False):
         df = pd.DataFrame(rows)
         df.to_csv(filename, index=False)
         print(f"📝 Wrote {len(rows)} rows to {filename}")
+        # Hand the freshly fetched edges to the caller so analysis doesn't have to re-read the CSV
+        if on_edges:
+            on_edges(address, from_tracer(df))
 
     graph_data[address] = {"edges": edges}
     with open(jsonfile, "w") as jf:
@@ -144,13 +155,20 @@ def trace_wallet(state, address, depth, force=False):
     state["completed"].add(address)
     save_state(state)
 
-CHAINGE_ROOTS = [
-    "kaspa:qqwvnkp47wsj6n4hkdlgj8dsauyx0xvefunnwvvsmpq2udd0ka8ckmpuqw3k5",    
-    "kaspa:qpgmt2dn8wcqf0436n0kueap7yx82n7raurlj6aqjc3t3wm9y5ssqtg9e4lsm",
-    "kaspa:qpy03sxk3z22pacz2vkn2nrqeglvptugyqy54xal2skha6xh0cr7wjueueg79",
-    "kaspa:qz9cqmddjppjyth8rngevfs767m5nvm0480nlgs5ve8d6aegv4g9xzu2tgg0u",
-    "kaspa:qq9zagcza4jt76eev9jl5z0nqhe0thcu7js8larktj4sle7lvgnw7sfcewlty"
-]
+# Attribution on edges handed over by trace_wallet, without reading the CSVs back
+def analyze_edges(traced_edges, threshold=THRESHOLD):
+    edges = normalize(traced_edges.values())
+    if edges.empty:
+        print("❗ No traced edges to analyze.")
+        return None
+    arrays = build_arrays(edges, list(traced_edges))
+    df_deposits, df_pivot = attribution_tables(arrays, CHAINGE_ROOTS, CEX_WALLETS, ATTRIBUTION_DEPTH)
+    eligible = df_pivot[df_pivot["chainge_pct"] >= threshold].index
+    df_final = df_deposits[df_deposits["sender"].isin(eligible)]
+    print(f"🔍 Total KAS sent from ≥{threshold:.0%}-Chainge-funded wallets to CEXes: {df_final['amount_kas'].sum():,.2f} KAS")
+    for cex, total in df_final.groupby("cex")["amount_kas"].sum().items():
+        print(f"{cex:8} : {total:,.2f} KAS")
+    return df_final
 
 if __name__ == "__main__":
     state = load_state()
@@ -158,8 +176,21 @@ if __name__ == "__main__":
         for root in CHAINGE_ROOTS:
             state["queue"].append({"address": root, "depth": MAX_DEPTH})
 
+    traced_edges = {}
+    def collect(address, edges):
+        traced_edges[address] = edges
+
     while state["queue"]:
         current = state["queue"].pop(0)
-        trace_wallet(state, current["address"], current["depth"], force=False)
+        trace_wallet(state, current["address"], current["depth"], force=False,
+                     on_edges=collect if ANALYZE_AFTER_TRACE else None)
 
     print("✅ Full recursive tracing complete. All data saved to 'flow_data/'")
+
+    if ANALYZE_AFTER_TRACE:
+        # Wallets finished in an earlier run were not handed over this time; pick up their files
+        for address in state["completed"] - set(traced_edges):
+            path = f"flow_data/{address.replace(':', '_')}.csv"
+            if os.path.exists(path):
+                traced_edges[address] = read_edges_file(path)
+        analyze_edges(traced_edges)
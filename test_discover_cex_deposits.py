@@ -0,0 +1,38 @@
+import pandas as pd
+from discover_cex_deposits import score_candidates
+
+CEX = "kaspa:qcex"
+DEPOSIT = "kaspa:qdeposit"
+START_MS = 1700000000000
+HOUR_MS = 3_600_000
+
+# Users pay into one deposit address, each payment is swept to the exchange two minutes later
+def deposit_address_edges(n=6, swept_sompi=10**10):
+    rows = []
+    for i in range(n):
+        t = START_MS + i * HOUR_MS
+        rows.append({"tx_id": f"in{i}", "timestamp": t, "sender": f"kaspa:quser{i}", "recipient": DEPOSIT,
+                     "amount_sompi": 10**10})
+        rows.append({"tx_id": f"sw{i}", "timestamp": t + 120_000, "sender": DEPOSIT, "recipient": CEX,
+                     "amount_sompi": swept_sompi})
+    return pd.DataFrame(rows)
+
+def score(df):
+    return score_candidates(df, {CEX: "MEXC"}).set_index("address").loc[DEPOSIT]
+
+def test_timestamped_sweeps_get_timing_credit():
+    row = score(deposit_address_edges())
+    assert row["median_sweep_latency_s"] == 120
+    assert row["zero_balance_ratio"] == 1.0
+
+def test_unknown_timestamps_get_no_timing_credit():
+    timed = score(deposit_address_edges())
+    untimed = score(deposit_address_edges().assign(timestamp=0))
+    assert pd.isna(untimed["median_sweep_latency_s"])
+    assert untimed["zero_balance_ratio"] == 0.0
+    assert untimed["score"] < timed["score"]
+
+def test_negative_balance_is_not_swept_to_zero():
+    # Sweeping more than the inflows on file: those inflows are missing, not a balance of zero
+    row = score(deposit_address_edges(swept_sompi=2 * 10**10))
+    assert row["zero_balance_ratio"] == 0.0
@@ -0,0 +1,28 @@
+import pandas as pd
+from edge_schema import normalize, load_edges
+from graph_snapshot import build_arrays, attribution_tables
+
+ROOT = "kaspa:qroot"
+EXTERNAL = "kaspa:qexternal"
+WALLET = "kaspa:qwallet"
+CEX = "kaspa:qcex"
+
+def tracer_rows():
+    return pd.DataFrame([
+        {"tx_id": "a", "timestamp": "2024-01-01T00:00:00+00:00", "sender": ROOT, "recipient": WALLET, "amount_sompi": 50 * 10**8},
+        {"tx_id": "b", "timestamp": "2024-01-02T00:00:00+00:00", "sender": EXTERNAL, "recipient": WALLET, "amount_sompi": 50 * 10**8},
+        {"tx_id": "c", "timestamp": "2024-01-03T00:00:00+00:00", "sender": WALLET, "recipient": CEX, "amount_sompi": 90 * 10**8},
+        {"tx_id": "c", "timestamp": "2024-01-03T00:00:00+00:00", "sender": WALLET, "recipient": WALLET, "amount_sompi": 10 * 10**8},
+    ])
+
+def test_normalize_drops_change_outputs():
+    edges = normalize([tracer_rows()])
+    assert len(edges) == 3
+    assert not (edges["sender"] == edges["recipient"]).any()
+
+def test_change_is_not_counted_as_chainge_funding(tmp_path):
+    tracer_rows().to_csv(tmp_path / "kaspa_qwallet.csv", index=False)
+    snap = build_arrays(*load_edges(str(tmp_path)))
+    df_deposits, df_pivot = attribution_tables(snap, [ROOT], {CEX: "MEXC"}, 4)
+    assert df_deposits["amount_kas"].tolist() == [90.0]
+    assert df_pivot.loc[WALLET, "chainge_pct"] == 0.5
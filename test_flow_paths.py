@@ -0,0 +1,37 @@
+import random
+import networkx as nx
+from flow_paths import top_k_widest_paths
+
+def brute_force_widths(graph, roots, target, k, max_depth):
+    G = nx.DiGraph([(u, v, {"weight": w}) for u, nbrs in graph.items() for v, w in nbrs.items()])
+    widths = [float("inf")] if target in roots else []
+    for root in roots:
+        if root == target or root not in G or target not in G:
+            continue
+        for path in nx.all_simple_paths(G, root, target, cutoff=max_depth):
+            widths.append(min(G[u][v]["weight"] for u, v in zip(path, path[1:])))
+    return sorted(widths, reverse=True)[:k]
+
+def random_graph(rng, n_nodes, density):
+    graph = {}
+    for u in range(n_nodes):
+        for v in range(n_nodes):
+            if u != v and rng.random() < density:
+                graph.setdefault(u, {})[v] = rng.randint(1, 15)
+    return graph
+
+def test_top_k_matches_all_simple_paths():
+    k, max_depth = 6, 5
+    for seed in range(300):
+        rng = random.Random(seed)
+        graph = random_graph(rng, rng.randint(4, 9), rng.uniform(0.2, 0.7))
+        roots = [0, 1]
+        targets = list(range(2, 9))
+        found = top_k_widest_paths(graph, roots, targets, k, max_depth)
+        for t in targets:
+            widths = [w for w, _ in found[t]]
+            assert widths == brute_force_widths(graph, roots, t, k, max_depth), (seed, t)
+            for width, path in found[t]:
+                assert path[0] in roots and path[-1] == t
+                assert len(set(path)) == len(path) and len(path) - 1 <= max_depth
+                assert min((graph[u][v] for u, v in zip(path, path[1:])), default=float("inf")) == width
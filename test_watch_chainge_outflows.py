@@ -0,0 +1,120 @@
+import os
+import random
+import pandas as pd
+import requests
+from kaspa_api_stub import TxStore, Faults, make_tx, synthetic_store, serve_in_thread
+from wallet_registry import CHAINGE_ROOTS, CEX_WALLETS
+from watch_chainge_outflows import (new_state, fetch_new_transactions, ingest_transaction, poll_once,
+                                    chainge_pct, THRESHOLD)
+
+CEX = next(iter(CEX_WALLETS))
+
+def synthetic():
+    return synthetic_store(CHAINGE_ROOTS, CEX_WALLETS, n_intermediaries=60, n_external=60, n_txs=3000, seed=3)
+
+# Attribution over every transaction in the store at once: what the watcher must converge to
+def full_evaluation(store, flow_dir):
+    state = new_state(flow_dir=flow_dir)
+    deposits = []
+    for tx in sorted(store.txs.values(), key=lambda t: t["block_time"]):
+        deposits += ingest_transaction(state, tx)
+    cache = {}
+    return {d["tx_id"] for d in deposits if chainge_pct(state, d["from_address"], cache) >= THRESHOLD}
+
+# Poll until every watched address is caught up and a round changes nothing; returns (emitted, requests)
+def run_watcher(store, flow_dir, max_rounds=12):
+    faults = Faults()
+    server, base = serve_in_thread(store, faults)
+    try:
+        state = new_state(flow_dir=flow_dir)
+        session = requests.Session()
+        emitted = set()
+        for _ in range(max_rounds):
+            watched = dict(state["watch"])
+            events = poll_once(state, session, base)
+            emitted |= {ev["tx_id"] for ev in events}
+            if not events and state["watch"] == watched and set(watched) <= state["caught_up"]:
+                break
+        return emitted, faults.stats["requests"]
+    finally:
+        server.shutdown()
+
+# Tracer-format CSVs (all outputs of every transaction touching the wallet) for transactions up to `until`
+def write_flow_data(store, flow_dir, until):
+    received = {out["script_public_key_address"] for tx in store.txs.values() for out in tx["outputs"]
+                if out["script_public_key_address"] != tx["inputs"][0]["previous_outpoint_address"]}
+    traced = (set(CHAINGE_ROOTS) | received) - set(CEX_WALLETS)
+    rows = {}
+    for tx in store.txs.values():
+        if tx["block_time"] > until:
+            continue
+        sender = tx["inputs"][0]["previous_outpoint_address"]
+        tx_rows = [{"tx_id": tx["transaction_id"], "timestamp": pd.Timestamp(tx["block_time"], unit="ms", tz="UTC").isoformat(),
+                    "sender": sender, "recipient": out["script_public_key_address"], "amount_sompi": out["amount"]}
+                   for out in tx["outputs"]]
+        for address in {sender} | {out["script_public_key_address"] for out in tx["outputs"]}:
+            if address in traced:
+                rows.setdefault(address, []).extend(tx_rows)
+    os.makedirs(flow_dir, exist_ok=True)
+    for address, wallet_rows in rows.items():
+        pd.DataFrame(wallet_rows).to_csv(os.path.join(flow_dir, f"{address.replace(':', '_')}.csv"), index=False)
+
+def test_transactions_sharing_the_cursor_timestamp_are_all_fetched():
+    rng = random.Random(0)
+    store = TxStore()
+    address = "kaspa:qwatched"
+    block_time = 1700000000000
+    store.add(make_tx(rng, address, CEX, 10**8, block_time - 1000))
+    same_time = [make_tx(rng, address, CEX, n * 10**8, block_time) for n in range(1, 4)]
+    for tx in same_time:
+        store.add(tx)
+    store.sort()
+
+    server, base = serve_in_thread(store)
+    try:
+        txs, cursor = fetch_new_transactions(requests.Session(), address, block_time, base, limit=1)
+    finally:
+        server.shutdown()
+    assert {tx["transaction_id"] for tx in txs} == {tx["transaction_id"] for tx in same_time}
+    assert cursor == block_time
+
+def test_expansion_follows_the_sender_not_the_polled_address(tmp_path):
+    state = new_state(flow_dir=str(tmp_path))
+    intermediary, new_wallet = "kaspa:qintermediary", "kaspa:qnewwallet"
+    state["watch"][intermediary] = 1
+    tx = {"transaction_id": "t1", "block_time": 1700000000000,
+          "inputs": [{"previous_outpoint_address": intermediary}],
+          "outputs": [{"script_public_key_address": CEX, "amount": 5 * 10**8},
+                      {"script_public_key_address": new_wallet, "amount": 10**8}]}
+
+    # First seen while polling the CEX wallet, which is watched at depth 0
+    deposits = ingest_transaction(state, tx)
+    assert [d["from_address"] for d in deposits] == [intermediary]
+    assert state["watch"][new_wallet] == 0
+    assert new_wallet not in state["caught_up"]
+
+def test_emitted_deposits_match_full_evaluation(tmp_path):
+    store = synthetic()
+    expected = full_evaluation(store, str(tmp_path))
+    emitted, _ = run_watcher(store, str(tmp_path))
+    assert expected
+    assert emitted == expected
+
+def test_fresh_state_is_seeded_from_traced_files(tmp_path):
+    store = synthetic()
+    times = sorted(tx["block_time"] for tx in store.txs.values())
+    until = times[len(times) * 3 // 4]
+    flow_dir = str(tmp_path / "flow_data")
+    write_flow_data(store, flow_dir, until)
+
+    state = new_state(flow_dir=flow_dir)
+    assert len(state["watch"]) > len(CHAINGE_ROOTS) + len(CEX_WALLETS)
+    assert all(state["cursors"][w] >= times[0] for w in state["watch"])
+
+    # Deposits already on file are not new: only the later ones are reported
+    expected = {txid for txid in full_evaluation(store, str(tmp_path)) if store.txs[txid]["block_time"] > until}
+    emitted, seeded_requests = run_watcher(store, flow_dir)
+    _, fresh_requests = run_watcher(store, str(tmp_path))
+    assert expected
+    assert emitted == expected
+    assert seeded_requests < fresh_requests
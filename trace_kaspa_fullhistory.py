@@ -4,19 +4,12 @@ import os
 import json
 import pandas as pd
 from datetime import datetime, timezone
+from wallet_registry import CHAINGE_ROOTS
 
-API_BASE = "https://api.kaspa.org"
+API_BASE = os.environ.get("KASPA_API_BASE", "https://api.kaspa.org")
 DATA_DIR = "flow_data_fullhistory"
 os.makedirs(DATA_DIR, exist_ok=True)
 
-CHAINGE_ROOTS = [
-    "kaspa:qqwvnkp47wsj6n4hkdlgj8dsauyx0xvefunnwvvsmpq2udd0ka8ckmpuqw3k5", # original marked Chainge Finance wallet - used for bridging until end of January 27 2024
-    "kaspa:qpgmt2dn8wcqf0436n0kueap7yx82n7raurlj6aqjc3t3wm9y5ssqtg9e4lsm",
-    "kaspa:qpy03sxk3z22pacz2vkn2nrqeglvptugyqy54xal2skha6xh0cr7wjueueg79",
-    "kaspa:qz9cqmddjppjyth8rngevfs767m5nvm0480nlgs5ve8d6aegv4g9xzu2tgg0u",
-    "kaspa:qq9zagcza4jt76eev9jl5z0nqhe0thcu7js8larktj4sle7lvgnw7sfcewlty" # vault - verified function in known bridge transactions, NOT marked on kas.fyi
-]
-
 def format_timestamp(ms):
     return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
 
@@ -0,0 +1,126 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+from edge_schema import wallet_from_filename
+
+DATA_DIR = "flow_data_fullhistory"
+OUTPUT_FILE = "wallet_balances_daily.csv"
+RESAMPLE_FREQ = "1D"
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+# Read every fullhistory CSV (or only those of the given wallets), dropping rows with unparseable timestamps
+def read_fullhistory(data_dir=DATA_DIR, wallets=None):
+    if wallets is None:
+        paths = sorted(glob.glob(os.path.join(data_dir, "*_fullhistory.csv")))
+    else:
+        paths = [os.path.join(data_dir, f"{w.replace(':', '_')}_fullhistory.csv") for w in wallets]
+        paths = [p for p in paths if os.path.exists(p)]
+
+    dfs = [pd.read_csv(p) for p in paths]
+    dfs = [df for df in dfs if not df.empty]
+    if not dfs:
+        return pd.DataFrame(columns=["tx_id", "timestamp", "sender", "recipient", "amount_sompi"])
+
+    df = pd.concat(dfs, ignore_index=True)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
+    return df.dropna(subset=["timestamp"]).reset_index(drop=True)
+
+# Drop duplicate rows and self-transfers (change outputs)
+def dedupe_transfers(df):
+    df = df.drop_duplicates(subset=["tx_id", "amount_sompi", "sender", "recipient", "timestamp"])
+    df = df[df["sender"] != df["recipient"]]
+    return df.reset_index(drop=True)
+
+def load_fullhistory(data_dir=DATA_DIR, wallets=None):
+    return dedupe_transfers(read_fullhistory(data_dir, wallets))
+
+def _signed_flows(df, wallet_index):
+    # Every transfer contributes +amount to a tracked recipient and -amount to a tracked sender
+    ts = ((df["timestamp"] - EPOCH) // pd.Timedelta(milliseconds=1)).to_numpy(dtype=np.int64)
+    amount = df["amount_sompi"].to_numpy(dtype=np.int64)
+    in_code = wallet_index.get_indexer(df["recipient"])
+    out_code = wallet_index.get_indexer(df["sender"])
+    in_mask = in_code >= 0
+    out_mask = out_code >= 0
+
+    code = np.concatenate([in_code[in_mask], out_code[out_mask]])
+    t = np.concatenate([ts[in_mask], ts[out_mask]])
+    flow = np.concatenate([amount[in_mask], -amount[out_mask]])
+    return code, t, flow
+
+# Running balance per (wallet, timestamp) for any number of wallets: one sort + segmented cumsum
+def compute_balances(df, wallets):
+    wallet_index = pd.Index(list(wallets))
+    code, t, flow = _signed_flows(df, wallet_index)
+    if len(code) == 0:
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime([], utc=True),
+            "wallet": pd.Series([], dtype=object),
+            "flow": pd.Series([], dtype=np.int64),
+            "balance": pd.Series([], dtype=np.int64),
+        })
+
+    order = np.lexsort((t, code))
+    code, t, flow = code[order], t[order], flow[order]
+
+    # Net out flows that share a wallet and timestamp
+    boundary = np.ones(len(code), dtype=bool)
+    boundary[1:] = (code[1:] != code[:-1]) | (t[1:] != t[:-1])
+    starts = np.flatnonzero(boundary)
+    flow = np.add.reduceat(flow, starts)
+    code = code[starts]
+    t = t[starts]
+
+    # Segmented cumsum: global cumsum minus the running total at each wallet's first row
+    total = np.cumsum(flow)
+    seg_start = np.ones(len(code), dtype=bool)
+    seg_start[1:] = code[1:] != code[:-1]
+    seg_id = np.cumsum(seg_start) - 1
+    balance = total - (total - flow)[seg_start][seg_id]
+
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(t, unit="ms", utc=True),
+        "wallet": wallet_index[code],
+        "flow": flow,
+        "balance": balance,
+    })
+
+# Inflow / outflow totals and max balance per wallet (all in sompi)
+def wallet_summary(df, balances, wallets):
+    wallet_index = pd.Index(list(wallets))
+    code, _, flow = _signed_flows(df, wallet_index)
+    flows = pd.DataFrame({"wallet": wallet_index[code], "flow": flow})
+
+    summary = pd.DataFrame(index=wallet_index)
+    summary["inflow_sompi"] = flows[flows["flow"] > 0].groupby("wallet")["flow"].sum()
+    summary["outflow_sompi"] = -flows[flows["flow"] < 0].groupby("wallet")["flow"].sum()
+    summary["max_balance_sompi"] = balances.groupby("wallet")["balance"].max()
+    summary["final_balance_sompi"] = balances.groupby("wallet")["balance"].last()
+    summary.index.name = "wallet"
+    return summary.fillna(0).astype(np.int64)
+
+# Wide table of balances at fixed intervals (one column per wallet, last balance carried forward)
+def resample_balances(balances, freq=RESAMPLE_FREQ):
+    if balances.empty:
+        return pd.DataFrame()
+    bucket = balances["timestamp"].dt.floor(freq)
+    wide = balances.assign(bucket=bucket).groupby(["bucket", "wallet"])["balance"].last().unstack("wallet")
+    full_range = pd.date_range(wide.index.min(), wide.index.max(), freq=freq)
+    wide = wide.reindex(full_range).ffill().fillna(0)
+    wide.index.name = "timestamp"
+    return wide
+
+if __name__ == "__main__":
+    df = load_fullhistory()
+    wallets = sorted(set(wallet_from_filename(p) for p in glob.glob(os.path.join(DATA_DIR, "*_fullhistory.csv"))))
+    if df.empty or not wallets:
+        print(f"❗ No fullhistory CSV files found in {DATA_DIR}.")
+    else:
+        balances = compute_balances(df, wallets)
+        summary = wallet_summary(df, balances, wallets)
+        resample_balances(balances).div(1e8).to_csv(OUTPUT_FILE)
+        print(f"📝 Wrote {RESAMPLE_FREQ} balances for {len(wallets)} wallets to {OUTPUT_FILE}")
+        for wallet, row in summary.iterrows():
+            print(f"{wallet[:12]}...{wallet[-6:]} | in {row.inflow_sompi / 1e8:,.0f} | "
+                  f"out {row.outflow_sompi / 1e8:,.0f} | max {row.max_balance_sompi / 1e8:,.0f} KAS")
@@ -0,0 +1,315 @@
+import argparse
+import json
+import os
+import time
+import requests
+import pandas as pd
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from edge_schema import load_edges
+from cex_aggregates import aggregates_dir, locked, load_aggregates, save_aggregates, ingest_deposits
+from wallet_registry import CHAINGE_ROOTS, CEX_WALLETS
+
+API_BASE = os.environ.get("KASPA_API_BASE", "https://api.kaspa.org")
+FLOW_DATA_DIR = "flow_data"
+STATE_FILE = "flow_data/watch_state.json"
+EVENTS_FILE = "chainge_cex_events.jsonl"
+POLL_INTERVAL = 30          # seconds between polling rounds
+PAGE_LIMIT = 50             # small pages: a quiet, caught-up address costs one tiny request per round
+MAX_PAGE_LIMIT = 500        # API maximum; used for catch-up paging and when one timestamp fills a whole page
+WATCH_DEPTH = 2             # how many hops downstream of the roots new recipients get watched
+MAX_DEPTH = 4               # attribution trace depth (same meaning as in the summary scripts)
+THRESHOLD = 0.95
+START_TIMESTAMP_MS = 1685577600000  # June 1, 2023 - backfill start for newly watched wallets not on file
+PENDING_TTL = 24 * 3600     # seconds an unattributed deposit is re-checked before it is dropped
+SEEN_TX_LIMIT = 200_000     # most recent transaction ids remembered for dedup
+
+def format_timestamp(ms_timestamp):
+    try:
+        return datetime.fromtimestamp(ms_timestamp / 1000, tz=timezone.utc).isoformat()
+    except Exception:
+        return ""
+
+# State: per-address cursors and watch depth, the inflow graph, and deposit bookkeeping.
+# "caught_up" holds watched addresses polled at least once since they were (re)added, "depositors" the
+# wallets watched only because they deposited to a CEX.
+def new_state(since=START_TIMESTAMP_MS, flow_dir=FLOW_DATA_DIR):
+    now_ms = int(time.time() * 1000)
+    state = {"since": since, "cursors": {}, "watch": {}, "inflows": {}, "seen_tx": {}, "pending": {},
+             "emitted": set(), "caught_up": set(), "depositors": set()}
+    seed_state(state, *load_edges(flow_dir))
+    for root in CHAINGE_ROOTS:
+        state["watch"][root] = WATCH_DEPTH
+        state["cursors"].setdefault(root, since)
+    # Deposit addresses are busy exchange wallets: only new transactions matter
+    for cex in CEX_WALLETS:
+        state["watch"][cex] = 0
+        state["cursors"][cex] = now_ms
+    return state
+
+# Start from what the tracers already saved instead of re-crawling it: every traced wallet is watched
+# (WATCH_DEPTH minus its hop distance from the roots, at least 0), its cursor is the latest timestamp on
+# file, the inflow graph holds every edge on file, and the transactions on file count as seen
+def seed_state(state, edges, traced):
+    for (recipient, sender), amount in edges.groupby(["recipient", "sender"])["amount_sompi"].sum().items():
+        state["inflows"].setdefault(recipient, {})[sender] = int(amount)
+
+    latest = edges.sort_values("timestamp").drop_duplicates("tx_id", keep="last")
+    state["seen_tx"] = dict.fromkeys(latest["tx_id"].tail(SEEN_TX_LIMIT))
+
+    traced = set(traced)
+    funding = defaultdict(set)
+    for sender, recipient in edges.loc[edges["recipient"].isin(traced), ["sender", "recipient"]].itertuples(index=False):
+        funding[sender].add(recipient)
+    hops = {root: 0 for root in CHAINGE_ROOTS}
+    queue = deque(CHAINGE_ROOTS)
+    while queue:
+        node = queue.popleft()
+        for nbr in funding.get(node, ()):
+            if nbr not in hops:
+                hops[nbr] = hops[node] + 1
+                queue.append(nbr)
+
+    last_seen = pd.concat([edges.groupby("sender")["timestamp"].max(), edges.groupby("recipient")["timestamp"].max()])
+    last_seen = last_seen.groupby(level=0).max()
+    for wallet in traced:
+        state["watch"][wallet] = max(WATCH_DEPTH - hops.get(wallet, WATCH_DEPTH), 0)
+        # Files without timestamps (KrcBot) give no cursor: those wallets are backfilled from `since`
+        if last_seen.get(wallet, 0) > 0:
+            state["cursors"][wallet] = int(last_seen[wallet])
+
+def load_state(path=STATE_FILE, since=START_TIMESTAMP_MS, flow_dir=FLOW_DATA_DIR):
+    if not os.path.exists(path):
+        return new_state(since, flow_dir)
+    with open(path, "r") as f:
+        loaded = json.load(f)
+    loaded["seen_tx"] = dict.fromkeys(loaded.get("seen_tx", []))
+    loaded["emitted"] = set(loaded.get("emitted", []))
+    loaded["caught_up"] = set(loaded.get("caught_up", []))
+    loaded["depositors"] = set(loaded.get("depositors", []))
+    return loaded
+
+def save_state(state, path=STATE_FILE):
+    to_save = dict(state)
+    to_save["seen_tx"] = list(state["seen_tx"])
+    to_save["emitted"] = list(state["emitted"])
+    to_save["caught_up"] = list(state["caught_up"])
+    to_save["depositors"] = list(state["depositors"])
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(to_save, f)
+    os.replace(tmp, path)
+
+# Fetch only transactions at or after the address cursor; page again only while pages come back full,
+# with MAX_PAGE_LIMIT pages once the first one shows the address is behind (catch-up).
+# Pages start one millisecond before the cursor so transactions sharing the cursor's block_time are never
+# skipped (ingest_transaction drops the ones already seen); a full page that does not move the cursor is
+# widened instead, so more transactions at one timestamp than fit in a page are still all returned.
+def fetch_new_transactions(session, address, cursor, api_base=API_BASE, limit=PAGE_LIMIT, max_retries=5):
+    txs = {}
+    retries = 0
+    page_limit = limit
+    while True:
+        url = (
+            f"{api_base}/addresses/{address}/full-transactions-page"
+            f"?limit={page_limit}&before=0&after={max(cursor - 1, 0)}"
+            f"&resolve_previous_outpoints=full&acceptance=accepted"
+        )
+        resp = session.get(url, timeout=10)
+        if resp.status_code == 429 and retries < max_retries:
+            retries += 1
+            wait = float(resp.headers.get("Retry-After", 5))
+            print(f"⏳ Rate limited on {address}, backing off {wait:.1f}s")
+            time.sleep(wait)
+            continue
+        resp.raise_for_status()
+        data = resp.json()
+        if not isinstance(data, list) or not data:
+            break
+        for tx in data:
+            txs[tx.get("transaction_id")] = tx
+        newest = max(tx.get("block_time", 0) for tx in data)
+        if len(data) < page_limit:
+            cursor = max(cursor, newest)
+            break
+        if newest > cursor:
+            cursor = newest
+            page_limit = MAX_PAGE_LIMIT
+        elif page_limit < MAX_PAGE_LIMIT:
+            page_limit = min(page_limit * 2, MAX_PAGE_LIMIT)
+        else:
+            print(f"⚠️ More than {MAX_PAGE_LIMIT} transactions at block_time {cursor} for {address}")
+            break
+    return list(txs.values()), cursor
+
+# Add one transaction to the inflow graph; returns the CEX deposits it contains. Downstream expansion
+# follows the sender's watch depth, whichever watched address the transaction was fetched from first.
+def ingest_transaction(state, tx):
+    txid = tx.get("transaction_id")
+    if txid in state["seen_tx"]:
+        return []
+    state["seen_tx"][txid] = None
+    if len(state["seen_tx"]) > SEEN_TX_LIMIT:
+        del state["seen_tx"][next(iter(state["seen_tx"]))]
+
+    inputs = tx.get("inputs") or []
+    outputs = tx.get("outputs") or []
+    sender = next((inp.get("previous_outpoint_address") for inp in inputs if inp.get("previous_outpoint_address")), None)
+    if not sender:
+        return []
+
+    since = state.get("since", START_TIMESTAMP_MS)
+    depth = state["watch"].get(sender, 0)
+    deposits = []
+    for out in outputs:
+        recipient = out.get("script_public_key_address")
+        amount = int(out.get("amount", 0))
+        if not recipient or recipient == sender:
+            continue
+        funders = state["inflows"].setdefault(recipient, {})
+        funders[sender] = funders.get(sender, 0) + amount
+
+        if recipient in CEX_WALLETS:
+            deposits.append({
+                "tx_id": txid,
+                "timestamp": format_timestamp(tx.get("block_time", 0)),
+                "from_address": sender,
+                "to_wallet": recipient,
+                "cex": CEX_WALLETS[recipient],
+                "amount_kas": amount / 1e8
+            })
+        elif depth > 0 and recipient not in state["watch"]:
+            state["watch"][recipient] = depth - 1
+            state["caught_up"].discard(recipient)
+            state["cursors"][recipient] = since
+    return deposits
+
+# Reverse BFS over the inflow graph: does this wallet reach a Chainge root within MAX_DEPTH?
+def is_chainge_funded(state, wallet, cache):
+    if wallet in cache:
+        return cache[wallet]
+    visited = set()
+    queue = deque([(wallet, 0)])
+    found = False
+    while queue:
+        current, depth = queue.popleft()
+        if current in CHAINGE_ROOTS:
+            found = True
+            break
+        if depth >= MAX_DEPTH or current in visited:
+            continue
+        visited.add(current)
+        for prev in state["inflows"].get(current, {}):
+            if prev not in visited:
+                queue.append((prev, depth + 1))
+    cache[wallet] = found
+    return found
+
+def chainge_pct(state, wallet, cache):
+    funders = state["inflows"].get(wallet, {})
+    total = sum(funders.values())
+    if total == 0:
+        return 0.0
+    chainge = sum(amt for src, amt in funders.items() if is_chainge_funded(state, src, cache))
+    return chainge / total
+
+# Watch a depositor for its funding history: a full backfill the first time, a catch-up from its old cursor after eviction
+def watch_depositor(state, wallet):
+    state["watch"][wallet] = 0
+    state["cursors"].setdefault(wallet, state.get("since", START_TIMESTAMP_MS))
+    state["caught_up"].discard(wallet)
+    state["depositors"].add(wallet)
+
+# Re-check every unattributed deposit against the current graph; returns newly attributed events.
+# Only depositors reachable from the roots get their funding backfilled, deposits that stay unattributed
+# for PENDING_TTL are dropped, and caught-up depositors below THRESHOLD stop being polled.
+def evaluate_pending(state):
+    cache = {}
+    events = []
+    now = time.time()
+    for txid, dep in list(state["pending"].items()):
+        sender = dep["from_address"]
+        if sender in state["watch"]:
+            if sender not in state["caught_up"]:
+                continue  # not polled yet: its funding is incomplete
+            pct = chainge_pct(state, sender, cache)
+            if pct >= THRESHOLD and txid not in state["emitted"]:
+                event = {k: v for k, v in dep.items() if k != "queued_at"}
+                events.append(dict(event, event="cex_deposit_attributed", chainge_pct=round(pct, 4),
+                                   detected_at=datetime.now(timezone.utc).isoformat()))
+                state["emitted"].add(txid)
+                del state["pending"][txid]
+                continue
+        elif is_chainge_funded(state, sender, cache):
+            watch_depositor(state, sender)
+            continue
+        if now - dep.get("queued_at", now) > PENDING_TTL:
+            del state["pending"][txid]
+
+    waiting = {dep["from_address"] for dep in state["pending"].values()}
+    for wallet in state["depositors"] & state["caught_up"]:
+        if wallet in state["watch"] and wallet not in waiting and chainge_pct(state, wallet, cache) < THRESHOLD:
+            del state["watch"][wallet]
+    return events
+
+def emit(events, events_file=EVENTS_FILE):
+    if not events:
+        return
+    with open(events_file, "a") as f:
+        for ev in events:
+            line = json.dumps(ev)
+            print(line, flush=True)
+            f.write(line + "\n")
+
+def poll_once(state, session, api_base=API_BASE):
+    for address in list(state["watch"]):
+        # Addresses not caught up yet start with full pages: they are known to be behind
+        limit = PAGE_LIMIT if address in state["caught_up"] else MAX_PAGE_LIMIT
+        try:
+            txs, cursor = fetch_new_transactions(session, address, state["cursors"].get(address, state["since"]),
+                                                 api_base, limit)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Poll failed for {address}: {e}")
+            continue
+        state["cursors"][address] = cursor
+        state["caught_up"].add(address)
+        for tx in sorted(txs, key=lambda t: t.get("block_time", 0)):
+            for dep in ingest_transaction(state, tx):
+                if dep["tx_id"] not in state["emitted"]:
+                    state["pending"][dep["tx_id"]] = dict(dep, queued_at=time.time())
+    return evaluate_pending(state)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch Chainge-linked wallets for new CEX deposits")
+    parser.add_argument("--api-base", default=API_BASE, help="Kaspa REST API base URL (e.g. a local stub)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL)
+    parser.add_argument("--since", type=int, default=START_TIMESTAMP_MS, help="backfill start (ms) for wallets not on file")
+    parser.add_argument("--flow-data", default=FLOW_DATA_DIR, help="traced wallet CSVs a fresh state is seeded from")
+    parser.add_argument("--state", default=STATE_FILE)
+    parser.add_argument("--events", default=EVENTS_FILE)
+    parser.add_argument("--aggregates", default=aggregates_dir("watch", THRESHOLD),
+                        help="aggregates dir for deposits attributed at this daemon's THRESHOLD")
+    parser.add_argument("--once", action="store_true", help="run a single polling round and exit")
+    args = parser.parse_args()
+
+    state = load_state(args.state, args.since, args.flow_data)
+    session = requests.Session()
+    print(f"👀 Watching {len(state['watch'])} addresses via {args.api_base}")
+    while True:
+        started = time.time()
+        events = poll_once(state, session, args.api_base)
+        emit(events, args.events)
+        if events:
+            # Keep the materialized CEX outflow views current without a batch rerun
+            with locked(args.aggregates):
+                aggregates = load_aggregates(args.aggregates, THRESHOLD)
+                df_events = pd.DataFrame(events)
+                ingest_deposits(aggregates, df_events, df_events["from_address"])
+                save_aggregates(aggregates, args.aggregates)
+        save_state(state, args.state)
+        print(f"🔁 Round done: {len(events)} new attributed deposits, {len(state['pending'])} pending, "
+              f"{len(state['watch'])} watched ({time.time() - started:.1f}s)")
+        if args.once:
+            break
+        time.sleep(max(0.0, args.interval - (time.time() - started)))